@@ -1,39 +1,178 @@
+import asyncio
+import datetime
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from typing import Any
 
 import httpx
-import datetime
+import orjson
 from mcp.server.fastmcp import FastMCP
 
-# Initialize FastMCP server
-mcp = FastMCP("metaodi-tools", host="0.0.0.0", port=8000)
-
 # Constants
 OPENERZ_API = "https://openerz.metaodi.ch/api"
 TECDOTTIR_API = "https://tecdottir.metaodi.ch"
 USER_AGENT = "metaodi-mcp-app/1.0"
 
+# OpenERZ endpoints, relative to OPENERZ_API (the shared client's base URL)
+REGIONS_PATH = "/parameter/regions"
+AREAS_PATH = "/parameter/areas"
+TYPES_PATH = "/parameter/types"
+CALENDAR_PATH = "/calendar"
+
+# HTTP client settings (shared by all outgoing requests)
+TIMEOUTS = {"timeout": 30.0, "connect": 5.0}
+MAX_CONNECTIONS = 100
+MAX_KEEPALIVE_CONNECTIONS = 20
+REQUEST_ATTEMPTS = 2
+RETRY_BACKOFF = 0.25
+
+# Shared HTTP client for the whole process, created lazily (see `get_client`)
+CLIENT: httpx.AsyncClient | None = None
+_PREFETCH_TASK: asyncio.Task | None = None
+
+# In-process TTL cache for slowly changing OpenERZ parameter lists
+PARAMETER_CACHE_TTL = 3600
+_CACHE: dict[tuple, tuple[float, Any]] = {}  # key -> (expiry, data)
+_IN_FLIGHT: dict[tuple, asyncio.Task] = {}  # key -> running `_fill_cache` task
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared HTTP client, creating it with a keep-alive connection pool on first use."""
+    global CLIENT
+    if CLIENT is not None:
+        return CLIENT
+    CLIENT = httpx.AsyncClient(
+        base_url=OPENERZ_API,
+        headers={"User-Agent": USER_AGENT, "Accept": "application/json"},
+        timeout=httpx.Timeout(**TIMEOUTS),
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+        ),
+        # Multiplex concurrent requests to the same host over one connection
+        http2=True,
+    )
+    return CLIENT
+
+
+async def shutdown() -> None:
+    """Close the shared HTTP client and its pooled connections on server exit."""
+    global CLIENT, _PREFETCH_TASK
+    # The prefetch waits on a shielded cache fill, so cancel both and let them finish
+    # before the client they are using is closed
+    tasks = [task for task in (_PREFETCH_TASK, *_IN_FLIGHT.values()) if task is not None]
+    _PREFETCH_TASK = None
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    # Detach the client first, so a cancelled close never leaves a closed client behind
+    client, CLIENT = CLIENT, None
+    if client is not None:
+        await client.aclose()
+
+
+@asynccontextmanager
+async def lifespan(server: FastMCP) -> AsyncIterator[None]:
+    """Prepare the shared HTTP client when a session starts.
+
+    FastMCP enters the lifespan once per session, so the client is scoped
+    to the process instead (see `MetaodiMCP`) and only the first session
+    starts prefetching the region list.
+    """
+    global _PREFETCH_TASK
+    get_client()
+    if _PREFETCH_TASK is None:
+        # Warm the region cache in the background for the first tool call
+        _PREFETCH_TASK = asyncio.create_task(cached_request(REGIONS_PATH))
+    yield
+
+
+class MetaodiMCP(FastMCP):
+    """FastMCP server that closes the shared HTTP client when it stops.
+
+    `FastMCP.run` (used by `main` and by `mcp run`) dispatches to one of these
+    runners, so the cleanup happens for every transport and entry point.
+    """
+
+    async def run_stdio_async(self) -> None:
+        try:
+            await super().run_stdio_async()
+        finally:
+            await shutdown()
+
+    async def run_sse_async(self, mount_path: str | None = None) -> None:
+        try:
+            await super().run_sse_async(mount_path)
+        finally:
+            await shutdown()
+
+    async def run_streamable_http_async(self) -> None:
+        try:
+            await super().run_streamable_http_async()
+        finally:
+            await shutdown()
+
+
+# Initialize FastMCP server
+mcp = MetaodiMCP("metaodi-tools", host="0.0.0.0", port=8000, lifespan=lifespan)
+
 
 async def make_request(url: str, params: dict[str, Any] | None = None) -> dict[str, Any] | None:
     """Make a request to the OpenERZ API with proper error handling."""
-    headers = {"User-Agent": USER_AGENT, "Accept": "application/json"}
-    params = params or {}
-    async with httpx.AsyncClient() as client:
+    client = get_client()
+    for attempt in range(REQUEST_ATTEMPTS):
         try:
-            response = await client.get(
-                url, params=params, headers=headers, timeout=30.0
-            )
+            response = await client.get(url, params=params)
             response.raise_for_status()
-            return response.json()
-        except Exception:
+            return orjson.loads(response.content)
+        except (httpx.ConnectError, httpx.RemoteProtocolError):
+            # Transient connection failure (DNS, connection reset, ...), retry with backoff
+            if attempt + 1 < REQUEST_ATTEMPTS:
+                await asyncio.sleep(RETRY_BACKOFF * 2**attempt)
+        except (httpx.HTTPError, httpx.InvalidURL, orjson.JSONDecodeError):
+            # Timeout, HTTP error status, invalid URL or response, retrying won't help
             return None
+    return None
+
+
+async def _fill_cache(key: tuple, url: str, params: dict[str, Any] | None, ttl: float) -> dict[str, Any] | None:
+    """Fetch `url` and store a non-empty response under `key` (run once per key by `cached_request`)."""
+    try:
+        data = await make_request(url, params)
+        # Keys come from tool input, so drop expired entries and never keep empty results
+        now = time.monotonic()
+        for expired in [k for k, (expires, _) in _CACHE.items() if expires <= now]:
+            del _CACHE[expired]
+        if data and data.get("result"):
+            _CACHE[key] = (now + ttl, data)
+        return data
+    finally:
+        _IN_FLIGHT.pop(key, None)
+
+
+async def cached_request(url: str, params: dict[str, Any] | None = None, ttl: float = PARAMETER_CACHE_TTL) -> dict[str, Any] | None:
+    """Make a request like `make_request`, caching non-empty responses for `ttl` seconds."""
+    key = (url, tuple(sorted((params or {}).items())))
+    cached = _CACHE.get(key)
+    if cached and time.monotonic() < cached[0]:
+        return cached[1]
+
+    # Only one request per key hits the API, concurrent callers share its result (or failure)
+    task = _IN_FLIGHT.get(key)
+    if task is None:
+        task = _IN_FLIGHT[key] = asyncio.create_task(_fill_cache(key, url, params, ttl))
+    # A cancelled caller must not cancel the request for the others
+    return await asyncio.shield(task)
 
 
 def format_calendar_entry(entry: dict) -> str:
     """Format an OpenERZ calendar entry into a readable string."""
-    return f"""
-Date: {entry.get("date", "Unknown")}
-Waste Type: {entry.get("waste_type", "Unknown")}
-"""
+    g = entry.get
+    return "\n".join((
+        f"Date: {g('date', 'Unknown')}",
+        f"Waste Type: {g('waste_type', 'Unknown')}",
+    ))
 
 async def get_waste_collection_data(region: str, waste_type: str | None = None, area: str | None = None) -> str:
     """Get next waste collection for a region and waste type.
@@ -42,30 +181,29 @@ async def get_waste_collection_data(region: str, waste_type: str | None = None,
         region: The region to get waste collection information for
         waste_type: The type of waste to get collection information for
     """
-    # Validate region against server-provided list (if available)
-    regions_url = f"{OPENERZ_API}/parameter/regions"
-    regions_data = await make_request(regions_url)
-
-    if region not in regions_data.get("result", []):
-        return f"Region '{region}' is not valid. Use the 'list_waste_regions' tool to see valid values."
-
-    # Try to fetch calendar entries for the region
-    calendar_url = f"{OPENERZ_API}/calendar"
-
     calendar_params = {
         "limit": 10,
         "region": region,
         "sort": "date",
-        "start": datetime.datetime.now().date().isoformat(),
+        "start": datetime.date.today().isoformat(),
     }
     if waste_type:
         calendar_params["types"] = waste_type
     if area:
         calendar_params["area"] = area
-    
-    data = await make_request(calendar_url, calendar_params)
 
-    if not data:
+    # Fetch the region list and the calendar entries concurrently
+    regions_data, data = await asyncio.gather(
+        cached_request(REGIONS_PATH),
+        make_request(CALENDAR_PATH, calendar_params),
+        return_exceptions=True,
+    )
+
+    # Validate region against server-provided list (if available)
+    if isinstance(regions_data, dict) and region not in regions_data.get("result", []):
+        return f"Region '{region}' is not valid. Use the 'list_waste_regions' tool to see valid values."
+
+    if not data or isinstance(data, BaseException):
         return "Unable to fetch waste collection data for this region."
 
     # Normalize possible response shapes to a list of entries
@@ -74,12 +212,14 @@ async def get_waste_collection_data(region: str, waste_type: str | None = None,
     if not entries:
         return "No upcoming waste collection entries found for this region."
     
-    areas = set(e.get("area") for e in entries if e.get("area"))
-    if len(areas) > 1 and not area:
-        return f"Multiple areas ({', '.join(areas)}) found for region '{region}'. Please specify an area using the 'area' parameter. Use the 'list_waste_areas' tool to see valid values."
+    # Only needed when no area was given, the API already filters by area otherwise
+    if not area:
+        areas = {a for e in entries if (a := e.get("area"))}
+        if len(areas) > 1:
+            return f"Multiple areas ({', '.join(areas)}) found for region '{region}'. Please specify an area using the 'area' parameter. Use the 'list_waste_areas' tool to see valid values."
 
-    formatted = [format_calendar_entry(e) for e in entries[:10]]
-    return "\n---\n".join(formatted)
+    # The API already limits the result to 10 entries
+    return "\n---\n".join(format_calendar_entry(e) for e in entries)
 
 @mcp.tool()
 async def get_next_waste_collection_for_type(waste_type: str, region: str, area: str | None = None) -> str:
@@ -91,9 +231,8 @@ async def get_next_waste_collection_for_type(waste_type: str, region: str, area:
         area: The area within the region to get waste collection information for
     """
     # Validate waste type against server-provided list (if available)
-    types_url = f"{OPENERZ_API}/parameter/types"
     types_params = {"region": region}
-    types_data = await make_request(types_url, params=types_params)
+    types_data = await make_request(TYPES_PATH, params=types_params)
 
     if not types_data or waste_type not in types_data.get("result", []):
         return f"Waste type '{waste_type}' is not valid for region '{region}'. Use the 'list_waste_types' tool to see valid values."
@@ -116,8 +255,7 @@ async def list_waste_regions() -> str:
     This tool queries the API and returns a human-readable list of region ids/names
     so callers can provide a valid `region` value to `get_next_waste_collection`.
     """
-    url = f"{OPENERZ_API}/parameter/regions"
-    data = await make_request(url)
+    data = await cached_request(REGIONS_PATH)
     if not data:
         return "Unable to fetch regions from OpenERZ API."
 
@@ -132,13 +270,12 @@ async def list_waste_areas(region: str) -> str:
     This tool queries the API and returns a human-readable list of area names or zip codes (depending on the region)
     so callers can provide a valid `area` value to `get_next_waste_collection`.
     """
-    url = f"{OPENERZ_API}/parameter/areas"
     params = {"region": region}
-    data = await make_request(url, params=params)
+    data = await cached_request(AREAS_PATH, params=params)
     if not data:
         return f"Unable to fetch areas for region {region} from OpenERZ API."
 
-    areas = list(e.get("area") for e in data["result"] if e.get("area"))
+    areas = {a for e in data["result"] if (a := e.get("area"))}
     return "\n".join(sorted(areas))
 
 @mcp.tool()
@@ -148,9 +285,8 @@ async def list_waste_types(region: str) -> str:
     This tool queries the API and returns a human-readable list of waste type names
     so callers can provide a valid `waste_type` value to `get_next_waste_collection_for_type`.
     """
-    url = f"{OPENERZ_API}/parameter/types"
     params = {"region": region}
-    data = await make_request(url, params=params)
+    data = await make_request(TYPES_PATH, params=params)
     if not data:
         return f"Unable to fetch waste types for region {region} from OpenERZ API."
 
@@ -0,0 +1,170 @@
+"""Unit tests for the request helpers in app.py.
+
+The shared HTTP client is replaced by one using an httpx.MockTransport, so
+these tests run without network access. They cover:
+1. The TTL cache in front of the OpenERZ parameter endpoints
+2. Sharing of in-flight requests between concurrent callers
+3. The retry policy of make_request
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+import app
+
+
+@pytest.fixture(autouse=True)
+async def reset_app(monkeypatch):
+    """Start every test with an empty cache and no retry backoff."""
+    app._CACHE.clear()
+    app._IN_FLIGHT.clear()
+    monkeypatch.setattr(app, "RETRY_BACKOFF", 0)
+    yield
+    await app.shutdown()
+    app._CACHE.clear()
+
+
+def use_mock_api(handler) -> list[httpx.Request]:
+    """Route the shared client through `handler` and return the list of requests it receives."""
+    requests = []
+
+    async def recording_handler(request):
+        requests.append(request)
+        response = handler(request)
+        if asyncio.iscoroutine(response):
+            response = await response
+        return response
+
+    app.CLIENT = httpx.AsyncClient(
+        base_url=app.OPENERZ_API,
+        transport=httpx.MockTransport(recording_handler),
+    )
+    return requests
+
+
+def regions(request):
+    return httpx.Response(200, json={"result": ["zurich", "basel"]})
+
+
+@pytest.mark.asyncio
+async def test_cached_request_hit():
+    """A second call within the TTL is served from the cache."""
+    requests = use_mock_api(regions)
+
+    first = await app.cached_request(app.REGIONS_PATH)
+    second = await app.cached_request(app.REGIONS_PATH)
+
+    assert first == second == {"result": ["zurich", "basel"]}
+    assert len(requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_cached_request_expiry():
+    """Expired entries are fetched again and swept when the cache is refilled."""
+    requests = use_mock_api(regions)
+
+    await app.cached_request(app.REGIONS_PATH, ttl=0)
+    await app.cached_request(app.REGIONS_PATH, ttl=0)
+    assert len(requests) == 2
+
+    await app.cached_request(app.AREAS_PATH, params={"region": "zurich"})
+    assert list(app._CACHE) == [(app.AREAS_PATH, (("region", "zurich"),))]
+
+
+@pytest.mark.asyncio
+async def test_cached_request_concurrent_callers_share_request():
+    """Concurrent callers for the same key wait for a single request."""
+    async def slow_regions(request):
+        await asyncio.sleep(0.05)
+        return regions(request)
+
+    requests = use_mock_api(slow_regions)
+
+    results = await asyncio.gather(*[app.cached_request(app.REGIONS_PATH) for _ in range(5)])
+
+    assert all(r == {"result": ["zurich", "basel"]} for r in results)
+    assert len(requests) == 1
+    assert not app._IN_FLIGHT
+
+
+@pytest.mark.asyncio
+async def test_cached_request_failures_are_shared_but_not_cached():
+    """A failed request is shared by concurrent callers, but the next call tries again."""
+    async def failing(request):
+        await asyncio.sleep(0.05)
+        return httpx.Response(503)
+
+    requests = use_mock_api(failing)
+
+    results = await asyncio.gather(*[app.cached_request(app.REGIONS_PATH) for _ in range(5)])
+    assert results == [None] * 5
+    assert len(requests) == 1
+
+    assert await app.cached_request(app.REGIONS_PATH) is None
+    assert len(requests) == 2
+    assert not app._CACHE
+
+
+@pytest.mark.asyncio
+async def test_cached_request_skips_empty_results():
+    """Empty results (e.g. an unknown region) are not cached."""
+    requests = use_mock_api(lambda request: httpx.Response(200, json={"result": []}))
+
+    await app.cached_request(app.AREAS_PATH, params={"region": "nowhere"})
+    await app.cached_request(app.AREAS_PATH, params={"region": "nowhere"})
+
+    assert len(requests) == 2
+    assert not app._CACHE
+
+
+@pytest.mark.asyncio
+async def test_make_request_retries_connect_error_once():
+    """A connection failure is retried once."""
+    def flaky(request):
+        if len(requests) == 1:
+            raise httpx.ConnectError("connection reset", request=request)
+        return regions(request)
+
+    requests = use_mock_api(flaky)
+
+    assert await app.make_request(app.REGIONS_PATH) == {"result": ["zurich", "basel"]}
+    assert len(requests) == 2
+
+
+@pytest.mark.asyncio
+async def test_make_request_gives_up_after_retry():
+    """A connection failure on the retry returns None."""
+    def down(request):
+        raise httpx.ConnectError("connection refused", request=request)
+
+    requests = use_mock_api(down)
+
+    assert await app.make_request(app.REGIONS_PATH) is None
+    assert len(requests) == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("error", ["timeout", "server_error", "invalid_json"])
+async def test_make_request_does_not_retry(error):
+    """Timeouts, error status codes and invalid responses return None without a retry."""
+    def handler(request):
+        if error == "timeout":
+            raise httpx.ReadTimeout("timed out", request=request)
+        if error == "server_error":
+            return httpx.Response(500)
+        return httpx.Response(200, content=b"not json")
+
+    requests = use_mock_api(handler)
+
+    assert await app.make_request(app.REGIONS_PATH) is None
+    assert len(requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_make_request_invalid_url():
+    """Tool input that produces an invalid URL returns None instead of raising."""
+    use_mock_api(regions)
+
+    assert await app.make_request(f"{app.TECDOTTIR_API}/measurements/a\nb") is None
@@ -13,9 +13,10 @@ For detailed MCP protocol testing (tools/resources), use the MCP client SDK
 or the MCP Inspector tool.
 """
 
-import json
+import asyncio
 import os
 import httpx
+import orjson
 import pytest
 
 # Get server URL from environment variable or use default
@@ -39,14 +40,19 @@ def parse_sse_response(response_text: str) -> dict:
     if "event: message" not in response_text:
         raise ValueError("Response is not in SSE format (missing 'event: message')")
     
-    # Find the data line
-    data_lines = [line for line in response_text.split('\n') if line.startswith('data: ')]
-    if not data_lines:
-        raise ValueError("No 'data:' line found in SSE response")
+    # Find the first data line without splitting the whole body into lines
+    if response_text.startswith("data: "):
+        start = 6
+    else:
+        idx = response_text.find("\ndata: ")
+        if idx < 0:
+            raise ValueError("No 'data:' line found in SSE response")
+        start = idx + 7
     
     # Extract and parse JSON
-    data_json = data_lines[0].replace('data: ', '')
-    return json.loads(data_json)
+    end = response_text.find("\n", start)
+    data_json = response_text[start:end] if end >= 0 else response_text[start:]
+    return orjson.loads(data_json)
 
 
 @pytest.mark.asyncio
@@ -69,18 +75,32 @@ async def test_server_is_responding():
             response = None
             successful_endpoint = None
             
-            for endpoint in endpoints_to_try:
+            async def probe(endpoint):
                 try:
-                    response = await client.get(f"{SERVER_URL}{endpoint}")
-                    if response.status_code < 500:
-                        successful_endpoint = endpoint
-                        break  # Got a valid response (even if 404, server is responding)
+                    return endpoint, await client.get(f"{SERVER_URL}{endpoint}")
                 except httpx.HTTPStatusError:
-                    continue
+                    return endpoint, None
                 except Exception as e:
-                    # Server might be waking up, continue trying
+                    # Server might be waking up, other endpoints may still respond
                     print(f"Attempt {endpoint} failed: {e}")
-                    continue
+                    return endpoint, None
+            
+            # Probe all endpoints concurrently so a cold start is only paid once
+            tasks = [asyncio.create_task(probe(endpoint)) for endpoint in endpoints_to_try]
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    endpoint, result = await next_done
+                    if result is None:
+                        continue
+                    response = result
+                    if response.status_code < 500:
+                        successful_endpoint = endpoint
+                        break  # Got a valid response (even if 404, server is responding)
+            finally:
+                for task in tasks:
+                    task.cancel()
+                # Let cancellation finish before the client is closed
+                await asyncio.gather(*tasks, return_exceptions=True)
             
             if response is None:
                 pytest.fail(f"Server at {SERVER_URL} is not responding to any known endpoints")